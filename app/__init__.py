@@ -11,10 +11,11 @@ from flask_jwt_extended import JWTManager
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config=None):
     """
     Erstellt und konfiguriert eine Instanz der Flask-Anwendung.
     Dieses Muster wird als "Application Factory" bezeichnet.
+    Über `config` können einzelne Einstellungen überschrieben werden (z.B. für Tests).
     """
     app = Flask(__name__)
 
@@ -40,6 +41,9 @@ def create_app():
     # Deaktiviert eine ressourcenintensive Funktion von SQLAlchemy, die nicht benötigt wird.
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    if config:
+        app.config.update(config)
+
     # --- Initialisierung der Erweiterungen mit der App ---
     db.init_app(app)
     login_manager.init_app(app)
@@ -56,6 +60,11 @@ def create_app():
     from .api_routes import api as api_blueprint
     app.register_blueprint(api_blueprint)
 
+    # --- CLI-Befehle registrieren ---
+    # 'flask snapshot <ziel>' rendert die öffentlichen Katalogseiten als statische Dateien.
+    from .snapshot import snapshot_command
+    app.cli.add_command(snapshot_command)
+
     # --- Konfiguration für Flask-Login (Web-Authentifizierung) ---
     # Leitet unauthentifizierte Benutzer zur Login-Seite weiter.
     login_manager.login_view = 'main.login'
@@ -0,0 +1,265 @@
+# app/snapshot.py
+"""
+Erzeugt statische Snapshots der öffentlichen Katalogseiten.
+
+Die Seiten `index`, `card_search?set=<id>` und die Karten-Modals sind für alle
+anonymen Besucher identisch und ändern sich nur beim Neuimport des Katalogs.
+Der Befehl `flask snapshot <ziel>` rendert sie (inkl. JSON-Varianten) als
+Dateien mit `.gz`-Geschwistern, sodass der Reverse-Proxy anonyme Anfragen
+direkt ausliefern kann. Sets werden parallel in einem Prozess-Pool gerendert,
+und zwar nur, wenn sich ihr Inhalts-Hash seit dem letzten Lauf geändert hat
+oder Dateien fehlen.
+
+Verzeichnisstruktur im Ziel:
+
+    index.html
+    cards/set/<set_id>/<page>.html   (+ .json)
+    card_modal/<card_id>.html        (+ .json)
+    manifest.json                    (Hashes des letzten Laufs)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .models import db, Card, Type, Set, Rarity
+
+MANIFEST_NAME = 'manifest.json'
+
+# Header, mit denen die Routen ihre HTML- bzw. JSON-Antwort liefern.
+HTML_HEADERS = {'Accept': 'text/html'}
+JSON_HEADERS = {'Accept': 'application/json'}
+
+# Die App-Instanz eines Worker-Prozesses (wird vom Pool-Initializer gesetzt).
+_worker_app = None
+_worker_base_url = None
+
+
+def write_file(path, data):
+    """
+    Schreibt `data` atomar nach `path` und legt eine `.gz`-Datei daneben.
+    Atomar, damit der Proxy während eines Laufs nie halbe Dateien ausliefert.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0 hält die komprimierten Dateien bei gleichem Inhalt byte-identisch.
+    for target, content in ((path, data), (path + '.gz', gzip.compress(data, 9, mtime=0))):
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, target)
+
+
+def remove_file(path):
+    """Entfernt eine Snapshot-Datei samt `.gz`-Geschwister, falls vorhanden."""
+    for target in (path, path + '.gz'):
+        if os.path.exists(target):
+            os.remove(target)
+
+
+def _hash(data):
+    """SHA-256 über eine JSON-serialisierbare Struktur."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def catalog_hash():
+    """
+    Hash über die Filter-Dropdowns der Kartensuche (Typen, Sets, Seltenheiten).
+    Diese erscheinen auf jeder Set-Seite, eine Änderung betrifft also alle Sets.
+    """
+    data = {
+        'types': [(t.id, t.name) for t in Type.query.order_by(Type.id)],
+        'sets': [(s.id, s.name, s.release_date) for s in Set.query.order_by(Set.id)],
+        'rarities': [(r.id, r.name) for r in Rarity.query.order_by(Rarity.id)],
+    }
+    return _hash(data)
+
+
+def cards_hash(set_id):
+    """Hash über die Kartendaten eines Sets. Bestimmt, ob die Modals neu gerendert werden."""
+    cards = Card.query.filter_by(set_id=set_id).order_by(Card.id).all()
+    return _hash([card.to_dict() for card in cards])
+
+
+def listing_hash(card_hash, base_hash):
+    """Hash der Set-Seiten: Kartendaten plus Filter-Dropdowns (Katalog-Hash)."""
+    return _hash({'cards': card_hash, 'catalog': base_hash})
+
+
+def files_present(paths):
+    """Prüft, ob alle Snapshot-Dateien samt `.gz`-Geschwister vorhanden sind."""
+    return all(os.path.exists(target) for path in paths for target in (path, path + '.gz'))
+
+
+def render(client, path, headers, base_url):
+    """Ruft eine Seite als anonymer Besucher ab und liefert den Antwort-Body."""
+    response = client.get(path, headers=headers, base_url=base_url)
+    if response.status_code != 200:
+        raise RuntimeError(f'{path} lieferte Status {response.status_code}')
+    return response.get_data()
+
+
+def _init_worker(config, base_url):
+    """
+    Initialisiert pro Worker-Prozess eine eigene App (und DB-Verbindung).
+    `config` enthält die Datenbank-Einstellungen der aufrufenden App.
+    """
+    global _worker_app, _worker_base_url
+    from . import create_app
+    _worker_app = create_app(config)
+    _worker_base_url = base_url
+
+
+def _snapshot_set_worker(out_dir, set_id, base_hash, previous, force):
+    """Einstiegspunkt im Worker-Prozess, siehe `snapshot_set`."""
+    return snapshot_set(_worker_app, _worker_base_url, out_dir, set_id, base_hash, previous, force)
+
+
+def snapshot_set(app, base_url, out_dir, set_id, base_hash, previous, force):
+    """
+    Rendert die Seiten eines Sets neu, sofern sich ihr Hash geändert hat oder
+    Dateien fehlen. Set-Seiten und Karten-Modals werden getrennt betrachtet:
+    Die Modals hängen nur von den Kartendaten ab, nicht von den Filter-Dropdowns.
+    Gibt `(set_id, manifest_eintrag, neu_gerendert)` zurück.
+    """
+    with app.test_request_context(base_url=base_url):
+        card_hash = cards_hash(set_id)
+        card_ids = [card_id for (card_id,) in Card.query.with_entities(Card.id).filter_by(set_id=set_id).order_by(Card.id)]
+    list_hash = listing_hash(card_hash, base_hash)
+
+    set_dir = os.path.join(out_dir, 'cards', 'set', str(set_id))
+    modal_dir = os.path.join(out_dir, 'card_modal')
+    pages = previous.get('pages', 0)
+    page_files = [os.path.join(set_dir, f'{page}.{ext}') for page in range(1, pages + 1) for ext in ('html', 'json')]
+    modal_files = [os.path.join(modal_dir, f'{card_id}.{ext}') for card_id in card_ids for ext in ('html', 'json')]
+
+    # Wie bei index.html: fehlende Dateien erzwingen ein Neurendern, auch bei gleichem Hash.
+    render_listing = force or list_hash != previous.get('listing_hash') or not pages or not files_present(page_files)
+    render_modals = force or card_hash != previous.get('cards_hash') or not files_present(modal_files)
+
+    client = app.test_client()
+    if render_listing:
+        page, pages = 1, 1
+        while page <= pages:
+            path = f'/cards?set={set_id}&page={page}'
+            json_data = render(client, path, JSON_HEADERS, base_url)
+            pages = max(json.loads(json_data)['total_pages'], 1)
+            write_file(os.path.join(set_dir, f'{page}.json'), json_data)
+            write_file(os.path.join(set_dir, f'{page}.html'), render(client, path, HTML_HEADERS, base_url))
+            page += 1
+
+        # Überzählige Seiten entfernen, falls das Set inzwischen weniger Seiten hat.
+        for name in os.listdir(set_dir):
+            stem = name.split('.', 1)[0]
+            if stem.isdigit() and int(stem) > pages:
+                os.remove(os.path.join(set_dir, name))
+
+    if render_modals:
+        for card_id in card_ids:
+            path = f'/card_modal/{card_id}'
+            write_file(os.path.join(modal_dir, f'{card_id}.html'), render(client, path, HTML_HEADERS, base_url))
+            write_file(os.path.join(modal_dir, f'{card_id}.json'), render(client, path, JSON_HEADERS, base_url))
+
+    entry = {'cards_hash': card_hash, 'listing_hash': list_hash, 'pages': pages, 'cards': card_ids}
+    return set_id, entry, render_listing or render_modals
+
+
+def load_manifest(out_dir):
+    """Lädt das Manifest des letzten Laufs (leer, falls keins existiert)."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'index': None, 'sets': {}}
+
+
+def build_snapshot(out_dir, base_url, workers=None, force=False):
+    """
+    Aktualisiert den Snapshot in `out_dir` und gibt die Liste der neu
+    gerenderten Set-IDs zurück.
+    """
+    app = current_app._get_current_object()
+    out_dir = os.path.abspath(out_dir)
+    manifest = load_manifest(out_dir)
+    old_sets = manifest.get('sets', {})
+
+    base_hash = catalog_hash()
+    set_ids = [set_id for (set_id,) in Set.query.with_entities(Set.id).order_by(Set.id)]
+
+    if workers == 1:
+        # Ohne Pool im eigenen Prozess rendern (z.B. für In-Memory-Datenbanken).
+        results = [
+            snapshot_set(app, base_url, out_dir, set_id, base_hash, old_sets.get(str(set_id), {}), force)
+            for set_id in set_ids
+        ]
+    else:
+        # Die Worker öffnen eigene Verbindungen; geerbte Verbindungen nicht teilen.
+        db.engine.dispose()
+        config = {key: app.config[key] for key in ('SQLALCHEMY_DATABASE_URI', 'SQLALCHEMY_BINDS')}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, base_url)) as pool:
+            futures = [
+                pool.submit(_snapshot_set_worker, out_dir, set_id, base_hash,
+                            old_sets.get(str(set_id), {}), force)
+                for set_id in set_ids
+            ]
+            results = [future.result() for future in as_completed(futures)]
+
+    new_sets, changed = {}, []
+    for set_id, entry, was_rendered in results:
+        new_sets[str(set_id)] = entry
+        if was_rendered:
+            changed.append(set_id)
+
+    # Dateien von Sets und Karten entfernen, die nicht mehr im Katalog sind.
+    current_cards = {card_id for entry in new_sets.values() for card_id in entry['cards']}
+    for set_id, entry in old_sets.items():
+        if set_id not in new_sets:
+            shutil.rmtree(os.path.join(out_dir, 'cards', 'set', set_id), ignore_errors=True)
+        for card_id in entry.get('cards', []):
+            if card_id not in current_cards:
+                for ext in ('html', 'json'):
+                    remove_file(os.path.join(out_dir, 'card_modal', f'{card_id}.{ext}'))
+
+    # Die Übersichtsseite ist eine einzelne Seite und wird direkt hier gerendert.
+    index_html = render(app.test_client(), '/', HTML_HEADERS, base_url)
+    index_hash = hashlib.sha256(index_html).hexdigest()
+    if force or index_hash != manifest.get('index') or not files_present([os.path.join(out_dir, 'index.html')]):
+        write_file(os.path.join(out_dir, 'index.html'), index_html)
+
+    manifest = {'index': index_hash, 'sets': new_sets}
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    return sorted(changed)
+
+
+@click.command('snapshot')
+@click.argument('out_dir', type=click.Path(file_okay=False))
+@click.option('--base-url', default=None,
+              help='Öffentliche Basis-URL, die in absolute Links (z.B. Bildpfade im JSON) eingesetzt wird. '
+                   'Standard: PREFERRED_URL_SCHEME und SERVER_NAME aus der App-Konfiguration.')
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help='Anzahl der Worker-Prozesse (Standard: Anzahl der CPUs).')
+@click.option('--force', is_flag=True, help='Alle Sets neu rendern, auch wenn sich ihr Hash nicht geändert hat.')
+@with_appcontext
+def snapshot_command(out_dir, base_url, workers, force):
+    """Rendert die öffentlichen Katalogseiten als statische Dateien nach OUT_DIR."""
+    if base_url is None:
+        # Die URL landet in jeder JSON-Datei, daher kein stiller Fallback auf localhost.
+        server_name = current_app.config.get('SERVER_NAME')
+        if not server_name:
+            raise click.UsageError('--base-url fehlt und SERVER_NAME ist nicht konfiguriert.')
+        base_url = f"{current_app.config['PREFERRED_URL_SCHEME']}://{server_name}/"
+    changed = build_snapshot(out_dir, base_url, workers=workers, force=force)
+    if changed:
+        click.echo(f'{len(changed)} Set(s) neu gerendert: {", ".join(map(str, changed))}')
+    else:
+        click.echo('Keine Änderungen am Katalog, Snapshot ist aktuell.')
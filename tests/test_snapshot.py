@@ -0,0 +1,155 @@
+# tests/test_snapshot.py
+import gzip
+import os
+
+import pytest
+
+from app import create_app
+from app.models import db, Card, Type, Set, Rarity, SetEra
+from app.snapshot import build_snapshot, HTML_HEADERS, JSON_HEADERS
+
+BASE_URL = 'https://tcg.example/'
+
+
+def make_app(database_uri):
+    return create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SQLALCHEMY_BINDS': {'users_db': 'sqlite://'},
+    })
+
+
+def seed(app):
+    """Zwei Sets: eins mit 25 Karten (zwei Seiten), eins mit 3 Karten."""
+    with app.app_context():
+        db.create_all()
+        era = SetEra(name='Karmesin & Purpur')
+        rarity = Rarity(name='Common')
+        fire = Type(name='Fire')
+        db.session.add_all([era, rarity, fire])
+        db.session.flush()
+        for set_index, card_count in enumerate((25, 3)):
+            set_ = Set(name=f'Set {set_index}', era_id=era.id, release_date=f'2023-0{set_index + 1}-01')
+            db.session.add(set_)
+            db.session.flush()
+            for number in range(card_count):
+                db.session.add(Card(
+                    id=f's{set_index}-{number}', name=f'Karte {number}', supertype='Pokémon',
+                    image_path=f'img/s{set_index}-{number}.png', number=f'{number + 1}/{card_count}',
+                    set_id=set_.id, rarity=rarity, types=[fire],
+                ))
+        db.session.commit()
+
+
+@pytest.fixture
+def app():
+    app = make_app('sqlite://')
+    seed(app)
+    return app
+
+
+def snapshot(app, out_dir, **kwargs):
+    with app.app_context():
+        return build_snapshot(str(out_dir), BASE_URL, **kwargs)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def assert_matches_live(app, out_dir):
+    """Jede Snapshot-Datei (und ihre .gz-Variante) entspricht der Live-Antwort."""
+    client = app.test_client()
+    expected = {os.path.join(out_dir, 'index.html'): ('/', HTML_HEADERS)}
+    with app.app_context():
+        for set_ in Set.query.all():
+            pages = client.get(f'/cards?set={set_.id}', headers=JSON_HEADERS, base_url=BASE_URL).get_json()['total_pages']
+            for page in range(1, max(pages, 1) + 1):
+                for ext, headers in (('html', HTML_HEADERS), ('json', JSON_HEADERS)):
+                    path = os.path.join(out_dir, 'cards', 'set', str(set_.id), f'{page}.{ext}')
+                    expected[path] = (f'/cards?set={set_.id}&page={page}', headers)
+        for card in Card.query.all():
+            for ext, headers in (('html', HTML_HEADERS), ('json', JSON_HEADERS)):
+                expected[os.path.join(out_dir, 'card_modal', f'{card.id}.{ext}')] = (f'/card_modal/{card.id}', headers)
+
+    for path, (url, headers) in expected.items():
+        live = client.get(url, headers=headers, base_url=BASE_URL).get_data()
+        assert read(path) == live, path
+        assert gzip.decompress(read(path + '.gz')) == live, path
+
+
+def test_snapshot_matches_live_responses(app, tmp_path):
+    assert snapshot(app, tmp_path, workers=1) == [1, 2]
+    assert_matches_live(app, tmp_path)
+    assert os.path.exists(tmp_path / 'cards' / 'set' / '1' / '2.html')
+    assert b'tcg.example/static/img/s0-0.png' in read(tmp_path / 'card_modal' / 's0-0.json')
+
+
+def test_second_run_renders_nothing(app, tmp_path):
+    snapshot(app, tmp_path, workers=1)
+    assert snapshot(app, tmp_path, workers=1) == []
+
+
+def test_new_set_does_not_rerender_card_modals(app, tmp_path):
+    snapshot(app, tmp_path, workers=1)
+    modal = tmp_path / 'card_modal' / 's1-0.html'
+    os.utime(modal, ns=(0, 0))
+
+    with app.app_context():
+        db.session.add(Set(name='Neues Set', era_id=1, release_date='2024-01-01'))
+        db.session.commit()
+
+    # Die Dropdowns aller Set-Seiten ändern sich, die Modals nicht.
+    assert snapshot(app, tmp_path, workers=1) == [1, 2, 3]
+    assert os.stat(modal).st_mtime_ns == 0
+    assert_matches_live(app, tmp_path)
+
+
+def test_missing_files_are_rebuilt(app, tmp_path):
+    snapshot(app, tmp_path, workers=1)
+    os.remove(tmp_path / 'cards' / 'set' / '1' / '2.json.gz')
+    os.remove(tmp_path / 'card_modal' / 's1-2.json')
+
+    assert snapshot(app, tmp_path, workers=1) == [1, 2]
+    assert_matches_live(app, tmp_path)
+
+
+def test_removed_cards_sets_and_pages_are_pruned(app, tmp_path):
+    snapshot(app, tmp_path, workers=1)
+
+    with app.app_context():
+        Card.query.filter(Card.id.in_([f's0-{n}' for n in range(10, 25)])).delete(synchronize_session=False)
+        Card.query.filter_by(set_id=2).delete()
+        db.session.delete(db.session.get(Set, 2))
+        db.session.commit()
+
+    assert snapshot(app, tmp_path, workers=1) == [1]
+    assert sorted(os.listdir(tmp_path / 'cards' / 'set' / '1')) == ['1.html', '1.html.gz', '1.json', '1.json.gz']
+    assert not os.path.exists(tmp_path / 'cards' / 'set' / '2')
+    assert not os.path.exists(tmp_path / 'card_modal' / 's0-10.html')
+    assert not os.path.exists(tmp_path / 'card_modal' / 's1-0.json.gz')
+    assert os.path.exists(tmp_path / 'card_modal' / 's0-9.html')
+    assert_matches_live(app, tmp_path)
+
+
+def test_process_pool(tmp_path):
+    app = make_app('sqlite:///' + str(tmp_path / 'cards.db'))
+    seed(app)
+    out_dir = tmp_path / 'out'
+
+    assert snapshot(app, out_dir, workers=2) == [1, 2]
+    assert_matches_live(app, out_dir)
+    assert snapshot(app, out_dir, workers=2) == []
+
+
+def test_cli_requires_base_url(app, tmp_path):
+    result = app.test_cli_runner().invoke(args=['snapshot', str(tmp_path)])
+    assert result.exit_code == 2
+    assert '--base-url' in result.output
+
+    app.config['SERVER_NAME'] = 'tcg.example'
+    result = app.test_cli_runner().invoke(args=['snapshot', str(tmp_path), '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    assert b'https://tcg.example/static/' not in read(tmp_path / 'card_modal' / 's0-0.json')
+    assert b'http://tcg.example/static/img/s0-0.png' in read(tmp_path / 'card_modal' / 's0-0.json')